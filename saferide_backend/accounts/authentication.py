@@ -0,0 +1,99 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+
+# ---------------------------
+# Officer LRU cache (per process)
+# ---------------------------
+class OfficerCache:
+    """Small thread-safe LRU cache of Officer rows keyed by primary key.
+
+    Entries expire after ``ttl`` seconds so that workers which never see a
+    ``post_save`` for an officer (other processes) still pick up changes.
+    """
+
+    def __init__(self, max_size, ttl):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, officer = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return officer
+
+    def set(self, key, officer):
+        if self.max_size <= 0:
+            return
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, officer)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+officer_cache = OfficerCache(
+    max_size=getattr(settings, "OFFICER_CACHE_MAX_SIZE", 1024),
+    ttl=getattr(settings, "OFFICER_CACHE_TTL", 300),
+)
+
+
+# ---------------------------
+# Cached JWT Authentication
+# ---------------------------
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWT authentication that serves the officer from ``officer_cache``.
+
+    The token itself is validated statelessly by simplejwt; only the user
+    lookup is cached. Misses fall back to ``JWTAuthentication.get_user`` so
+    the missing-user and inactive-user checks stay identical.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        officer = officer_cache.get(str(user_id)) if user_id is not None else None
+
+        if officer is None:
+            officer = super().get_user(validated_token)
+            officer_cache.set(str(user_id), officer)
+
+        # Hand out a copy so request-level changes never leak into the cache
+        return copy.copy(officer)
+
+
+class OptionalCachedJWTAuthentication(CachedJWTAuthentication):
+    """Same as ``CachedJWTAuthentication`` but treats a bad token as anonymous.
+
+    Used as the global default so that public (``AllowAny``) endpoints keep
+    working when the frontend sends an expired access token. Views that need
+    a logged-in officer use ``CachedJWTAuthentication`` directly.
+    """
+
+    def authenticate(self, request):
+        try:
+            return super().authenticate(request)
+        except (InvalidToken, AuthenticationFailed):
+            return None
@@ -0,0 +1,13 @@
+from django.contrib.auth import get_user_model
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .authentication import officer_cache
+
+Officer = get_user_model()
+
+
+@receiver(post_save, sender=Officer)
+@receiver(post_delete, sender=Officer)
+def invalidate_cached_officer(sender, instance, **kwargs):
+    officer_cache.invalidate(str(instance.pk))
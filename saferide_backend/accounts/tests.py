@@ -1,3 +1,56 @@
+from django.contrib.auth import get_user_model
 from django.test import TestCase
+from rest_framework.test import APIRequestFactory
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from .authentication import CachedJWTAuthentication, OptionalCachedJWTAuthentication, officer_cache
+
+Officer = get_user_model()
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        officer_cache.clear()
+        self.officer = Officer.objects.create_user(
+            username="KA-001",
+            email="officer@example.com",
+            password="secret-pass-123",
+            officer_id="KA-001",
+            officer_name="Test Officer",
+        )
+        self.factory = APIRequestFactory()
+
+    def _request(self, token):
+        return self.factory.get("/", HTTP_AUTHORIZATION=f"Bearer {token}")
+
+    def test_cache_hit_skips_officer_query(self):
+        auth = CachedJWTAuthentication()
+        token = AccessToken.for_user(self.officer)
+
+        with self.assertNumQueries(1):
+            user, _ = auth.authenticate(self._request(token))
+        with self.assertNumQueries(0):
+            cached_user, _ = auth.authenticate(self._request(token))
+
+        self.assertEqual(user.pk, self.officer.pk)
+        self.assertEqual(cached_user.pk, self.officer.pk)
+
+    def test_post_save_invalidates_cached_officer(self):
+        auth = CachedJWTAuthentication()
+        token = AccessToken.for_user(self.officer)
+        auth.authenticate(self._request(token))
+
+        self.officer.location = "Bengaluru"
+        self.officer.save()
+
+        with self.assertNumQueries(1):
+            user, _ = auth.authenticate(self._request(token))
+        self.assertEqual(user.location, "Bengaluru")
+
+    def test_invalid_token_is_anonymous_only_for_optional_auth(self):
+        request = self._request("not-a-valid-token")
+
+        self.assertIsNone(OptionalCachedJWTAuthentication().authenticate(request))
+        with self.assertRaises(InvalidToken):
+            CachedJWTAuthentication().authenticate(request)
@@ -0,0 +1,213 @@
+import asyncio
+import base64
+import binascii
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.files.storage import FileSystemStorage
+from django.http import JsonResponse, StreamingHttpResponse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+
+from .models import Violation, save_violations
+from .serializers import ViolationSerializer
+from .views import detect_frame, iter_video_detections, open_preview_writer
+
+# Async views run inference here so the event loop only awaits it and idle
+# connections cost no thread each. Model access itself is serialized by
+# views.inference_lock; a single worker keeps next()/close()/release() on a
+# video ordered.
+inference_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inference")
+
+# Emit a progress line every N processed frames (and always when violations are found)
+PROGRESS_EVERY = 15
+
+VIOLATIONS_CHUNK_SIZE = 200
+
+
+async def run_inference(func, *args):
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(inference_executor, func, *args)
+
+
+def _save_upload(uploaded_file):
+    fs = FileSystemStorage()
+    filename = fs.save(uploaded_file.name, uploaded_file)
+    return fs.path(filename)
+
+
+def _serialize_violations(violations):
+    return ViolationSerializer(violations, many=True).data
+
+
+# ---------------------------
+# Async Video Detection (streamed)
+# ---------------------------
+async def _stream_video_detections(cap, out, preview_name):
+    """Yield progress lines, then ``DATA: {...}`` with the saved violations.
+
+    Matches the line protocol the dashboard reads: free-form progress lines
+    containing ``(xx.x%)``, ``ERROR: <message>`` and a final ``DATA: <json>``.
+    """
+    frames = iter_video_detections(cap, out)
+    pending = []
+    processed = 0
+    try:
+        while True:
+            item = await run_inference(next, frames, None)
+            if item is None:
+                break
+            frame_count, total_frames, frame_violations = item
+            pending.extend(frame_violations)
+            processed += 1
+
+            if frame_violations or processed % PROGRESS_EVERY == 0:
+                percent = 100.0 * frame_count / total_frames if total_frames else 0.0
+                yield (
+                    f"Processed frame {frame_count}/{total_frames} ({percent:.1f}%)"
+                    f" - {len(pending)} violations\n"
+                )
+
+        saved = await sync_to_async(save_violations)(pending)
+        data = await sync_to_async(_serialize_violations)(saved)
+        payload = {
+            "violations": data,
+            "annotated_video": f"{settings.MEDIA_URL}previews/{preview_name}",
+        }
+        yield f"DATA: {json.dumps(payload)}\n"
+    except Exception as e:
+        yield f"ERROR: {e}\n"
+    finally:
+        # Queued behind any in-flight next() so the capture is released safely
+        # even when the client disconnects mid-stream
+        await run_inference(frames.close)
+
+
+class VideoStreamingHttpResponse(StreamingHttpResponse):
+    """Streaming response that releases the capture/writer when it is closed.
+
+    Covers the case where the stream is never iterated (client gone before the
+    first chunk), in which the generator's own cleanup never runs. Releasing
+    twice is harmless in OpenCV.
+    """
+
+    def __init__(self, *args, release, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._release = release
+
+    def close(self):
+        # Queued behind any in-flight frame so the capture isn't freed mid-read
+        inference_executor.submit(self._release)
+        super().close()
+
+
+@csrf_exempt
+@require_POST
+async def async_detect(request):
+    # Multipart parsing copies the whole upload; keep it off the event loop
+    files = await sync_to_async(lambda: request.FILES)()
+    if "file" not in files:
+        return JsonResponse({"error": "No file"}, status=400)
+
+    uploaded_file = files["file"]
+    if not uploaded_file.name.lower().endswith(('.mp4', '.avi', '.mov')):
+        return JsonResponse({"error": "Only video files supported"}, status=400)
+
+    filepath = await sync_to_async(_save_upload, thread_sensitive=False)(uploaded_file)
+
+    cap = await run_inference(cv2.VideoCapture, filepath)
+    if not cap.isOpened():
+        await run_inference(cap.release)
+        return JsonResponse({"error": "Cannot open video"}, status=400)
+    try:
+        out, preview_name = await run_inference(open_preview_writer, cap)
+    except Exception:
+        await run_inference(cap.release)
+        raise
+
+    response = VideoStreamingHttpResponse(
+        _stream_video_detections(cap, out, preview_name),
+        release=lambda: (cap.release(), out.release()),
+        content_type="text/plain; charset=utf-8",
+    )
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"  # don't let a proxy hold back progress lines
+    return response
+
+
+# ---------------------------
+# Async Live Detection (single frame)
+# ---------------------------
+def _detect_base64_frame(image_base64):
+    # Accept both raw base64 and "data:image/jpeg;base64,..." URLs from the canvas
+    encoded = image_base64.split(",", 1)[-1]
+    try:
+        raw = base64.b64decode(encoded, validate=True)
+    except (binascii.Error, ValueError):
+        raise ValueError("Invalid base64 image")
+    if not raw:
+        raise ValueError("Empty image")  # e.g. "data:," from a 0x0 canvas
+
+    try:
+        frame = cv2.imdecode(np.frombuffer(raw, dtype=np.uint8), cv2.IMREAD_COLOR)
+    except cv2.error:
+        frame = None
+    if frame is None:
+        raise ValueError("Invalid image")
+
+    processed_frame, violations = detect_frame(frame)
+    ok, jpeg = cv2.imencode(".jpg", processed_frame)
+    if not ok:
+        raise ValueError("Could not encode annotated frame")
+
+    annotated = "data:image/jpeg;base64," + base64.b64encode(jpeg.tobytes()).decode("ascii")
+    violation_types = [{"type": v["type"], "confidence": v["confidence"]} for v in violations]
+    return annotated, violation_types
+
+
+@csrf_exempt
+@require_POST
+async def async_live_detect(request):
+    try:
+        data = json.loads(request.body)
+    except ValueError:
+        return JsonResponse({"error": "Invalid JSON"}, status=400)
+    if not isinstance(data, dict):
+        return JsonResponse({"error": "Expected a JSON object"}, status=400)
+
+    image_base64 = data.get("image_base64")
+    if not isinstance(image_base64, str) or not image_base64:
+        return JsonResponse({"error": "image_base64 is required"}, status=400)
+
+    try:
+        annotated, violation_types = await run_inference(_detect_base64_frame, image_base64)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    return JsonResponse({
+        "annotated_image_base64": annotated,
+        "violation_types": violation_types,
+    })
+
+
+# ---------------------------
+# Async Violations List (chunked JSON)
+# ---------------------------
+async def _stream_violations():
+    yield "["
+    first = True
+    queryset = Violation.objects.all().order_by('-created_at')
+    async for violation in queryset.aiterator(chunk_size=VIOLATIONS_CHUNK_SIZE):
+        item = json.dumps(ViolationSerializer(violation).data)
+        yield item if first else "," + item
+        first = False
+    yield "]"
+
+
+@require_GET
+async def async_violations_list(request):
+    return StreamingHttpResponse(_stream_violations(), content_type="application/json")
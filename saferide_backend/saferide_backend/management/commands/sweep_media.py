@@ -0,0 +1,29 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from saferide_backend.retention import sweep
+
+
+class Command(BaseCommand):
+    help = "Apply MEDIA_RETENTION policies to uploads, previews and violation frames."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true",
+                            help="Report what would be removed or recompressed without touching files.")
+        parser.add_argument("--full", action="store_true",
+                            help="Ignore stored watermarks and rescan every file.")
+        parser.add_argument("--interval", type=int, default=0,
+                            help="Keep running, sweeping every N seconds (0 runs once).")
+
+    def handle(self, *args, **options):
+        while True:
+            results = sweep(dry_run=options["dry_run"], full=options["full"])
+            verb = "would process" if options["dry_run"] else "processed"
+            for name, count in results.items():
+                self.stdout.write(f"{name}: {verb} {count} files")
+
+            if options["interval"] <= 0:
+                break
+            options["full"] = False  # only the first pass rescans everything
+            time.sleep(options["interval"])
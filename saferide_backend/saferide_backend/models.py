@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 
 class Violation(models.Model):
     frame_image = models.ImageField(upload_to='violation_frames/')
@@ -7,4 +7,10 @@ class Violation(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     def _str_(self):
-        return f"{self.violation_type} - {self.confidence}"
\ No newline at end of file
+        return f"{self.violation_type} - {self.confidence}"
+
+
+def save_violations(violations):
+    # One short transaction per upload keeps the write lock brief under concurrent workers
+    with transaction.atomic():
+        return Violation.objects.bulk_create(violations)
@@ -0,0 +1,356 @@
+import json
+import os
+import re
+import time
+from datetime import datetime, timedelta, timezone
+
+import cv2
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.storage import default_storage
+from django.db import transaction
+
+from .models import Violation
+
+# Artifact types under MEDIA_ROOT:
+#   uploads           raw files saved by DetectView at the top of MEDIA_ROOT
+#   previews          annotated videos / preview images in previews/
+#   violation_frames  frames in violation_frames/ that have a Violation row
+#   saved_violations  frames an officer explicitly saved, in violations/
+#   orphan_frames     frames in violation_frames/ without a Violation row
+#
+# settings.MEDIA_RETENTION only overrides these, e.g.
+#   MEDIA_RETENTION = {"uploads": {"max_age_hours": 12}}
+DEFAULT_POLICIES = {
+    "uploads": {"action": "delete", "max_age_hours": 24},
+    "previews": {"action": "delete", "max_age_hours": 48},
+    "violation_frames": {"action": "recompress", "max_age_hours": 24 * 7, "jpeg_quality": 60},
+    "saved_violations": {"action": "keep"},
+    # Grace period must outlast the longest detection run: frames are written
+    # before their rows are bulk-created at the end of the upload
+    "orphan_frames": {"action": "delete", "max_age_hours": 6},
+}
+
+ALLOWED_ACTIONS = {
+    "uploads": {"keep", "delete"},
+    "previews": {"keep", "delete"},
+    "violation_frames": {"keep", "delete", "recompress"},
+    "saved_violations": {"keep", "delete"},
+    "orphan_frames": {"keep", "delete"},
+}
+
+# Day directories written by iter_video_detections under violation_frames/
+PARTITION_RE = re.compile(r"^\d{4}-\d{2}-\d{2}$")
+# Frames saved before partitioning sit directly in violation_frames/
+LEGACY_PARTITION = ""
+
+
+def get_policies():
+    policies = {name: dict(policy) for name, policy in DEFAULT_POLICIES.items()}
+    for name, overrides in getattr(settings, "MEDIA_RETENTION", {}).items():
+        if name not in policies:
+            raise ImproperlyConfigured(f"MEDIA_RETENTION: unknown artifact type '{name}'")
+        policies[name].update(overrides)
+
+    for name, policy in policies.items():
+        if policy["action"] not in ALLOWED_ACTIONS[name]:
+            raise ImproperlyConfigured(
+                f"MEDIA_RETENTION['{name}']: action '{policy['action']}' is not one of "
+                f"{sorted(ALLOWED_ACTIONS[name])}"
+            )
+        if policy["action"] != "keep" and policy.get("max_age_hours") is None:
+            raise ImproperlyConfigured(f"MEDIA_RETENTION['{name}']: max_age_hours is required")
+    return policies
+
+
+# ---------------------------
+# Sweep state (watermarks)
+# ---------------------------
+def _state_path():
+    return getattr(settings, "MEDIA_RETENTION_STATE_FILE", settings.BASE_DIR / ".media_retention.json")
+
+
+def load_state():
+    try:
+        with open(_state_path()) as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+
+def save_state(state):
+    path = _state_path()
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(state, f)
+    os.replace(tmp_path, path)
+
+
+# ---------------------------
+# File helpers
+# ---------------------------
+def _iter_files(directory, recursive=True):
+    """Yield ``(mtime, path)`` for regular, non-hidden files in ``directory``."""
+    if not os.path.isdir(directory):
+        return
+    if recursive:
+        paths = (
+            os.path.join(root, file)
+            for root, dirs, files in os.walk(directory)
+            for file in files if not file.startswith('.')
+        )
+    else:
+        with os.scandir(directory) as entries:
+            paths = [
+                entry.path for entry in entries
+                if not entry.name.startswith('.') and entry.is_file()
+            ]
+    for path in paths:
+        try:
+            yield os.path.getmtime(path), path
+        except FileNotFoundError:
+            continue  # removed while we were scanning
+
+
+def _remove(path, dry_run):
+    if dry_run:
+        return True
+    try:
+        os.remove(path)
+        return True
+    except FileNotFoundError:
+        return False
+
+
+def delete_old_files(directory, cutoff, batch_size, recursive=True, dry_run=False):
+    """Delete up to ``batch_size`` files older than ``cutoff``; returns the count.
+
+    Only used for directories this module keeps bounded (everything past the
+    cutoff is removed), so the scan stays proportional to the retention window.
+    """
+    deleted = 0
+    for mtime, path in _iter_files(directory, recursive):
+        if deleted >= batch_size:
+            break
+        if mtime < cutoff and _remove(path, dry_run):
+            deleted += 1
+    return deleted
+
+
+def recompress_image(path, quality):
+    """Re-encode a JPEG in place at ``quality``; returns True if the file shrank.
+
+    The original timestamps are restored, since other passes judge a frame's
+    age by its mtime.
+    """
+    image = cv2.imread(path)
+    if image is None:
+        return False
+    ok, jpeg = cv2.imencode(".jpg", image, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    st = os.stat(path)
+    if not ok or len(jpeg) >= st.st_size:
+        return False  # already small enough
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(jpeg.tobytes())
+    os.replace(tmp_path, path)
+    os.utime(path, (st.st_atime, st.st_mtime))
+    return True
+
+
+def _storage_path(name):
+    # Rows store os.path.join("violation_frames", ...), which may use either separator
+    return default_storage.path(name.replace("\\", "/"))
+
+
+# ---------------------------
+# Violation-backed frames
+# ---------------------------
+def recompress_violation_frames(cutoff, quality, batch_size, watermark, dry_run=False):
+    """Recompress frames of the next ``batch_size`` violations past ``watermark``.
+
+    Driven by ``Violation.id`` rather than a directory scan, so each sweep
+    reads only the rows it handles. Returns ``(count, new_watermark)``.
+    """
+    cutoff_dt = datetime.fromtimestamp(cutoff, tz=timezone.utc)
+    rows = list(
+        Violation.objects.filter(id__gt=watermark or 0, created_at__lt=cutoff_dt)
+        .order_by('id').values_list('id', 'frame_image')[:batch_size]
+    )
+    if not rows:
+        return 0, watermark
+
+    recompressed = 0
+    for pk, name in rows:
+        if not name:
+            continue
+        if dry_run or recompress_image(_storage_path(name), quality):
+            recompressed += 1
+
+    return recompressed, rows[-1][0]
+
+
+def expire_violations(cutoff, batch_size, dry_run=False):
+    """Delete up to ``batch_size`` Violation rows older than ``cutoff`` with their frames.
+
+    Rows go first inside a transaction; the files are removed only once it
+    commits, so a failed delete never leaves rows pointing at missing frames.
+    """
+    cutoff_dt = datetime.fromtimestamp(cutoff, tz=timezone.utc)
+    rows = list(
+        Violation.objects.filter(created_at__lt=cutoff_dt)
+        .order_by('id').values_list('id', 'frame_image')[:batch_size]
+    )
+    if dry_run:
+        return len(rows)
+
+    names = [name for pk, name in rows if name]
+
+    def delete_files():
+        for name in names:
+            default_storage.delete(name.replace("\\", "/"))
+
+    with transaction.atomic():
+        Violation.objects.filter(pk__in=[pk for pk, name in rows]).delete()
+        transaction.on_commit(delete_files)
+    return len(rows)
+
+
+def _day_end(partition):
+    """Timestamp after which no new frame can appear in a day directory."""
+    day = datetime.strptime(partition, "%Y-%m-%d")  # local time, as written by the views
+    return (day + timedelta(days=1)).timestamp()
+
+
+def _list_frames(directory):
+    try:
+        with os.scandir(directory) as entries:
+            return sorted(
+                entry.name for entry in entries
+                if not entry.name.startswith('.') and entry.is_file()
+            )
+    except FileNotFoundError:
+        return []
+
+
+def delete_orphan_frames(cutoff, batch_size, watermark, dry_run=False):
+    """Delete frames in violation_frames/ that no Violation row points at.
+
+    Frames live in day directories (``violation_frames/YYYY-MM-DD/``); frames
+    saved before that sit directly in violation_frames/ and are checked first.
+    Files are visited in (day, filename) order and ``watermark`` is the last
+    ``[day, filename]`` checked, so each sweep checks at most ``batch_size``
+    files with a single query and the next one resumes right after them. A
+    day is only entered once it is entirely older than ``cutoff``; a pre-day
+    frame newer than ``cutoff`` pauses the pass until it ages.
+
+    Each frame is checked once. Frames that become orphans later, e.g. when a
+    Violation row is deleted through the admin, are only found by a ``--full``
+    sweep. Returns ``(count, new_watermark)``.
+    """
+    frames_dir = os.path.join(settings.MEDIA_ROOT, "violation_frames")
+    if not os.path.isdir(frames_dir):
+        return 0, watermark
+
+    with os.scandir(frames_dir) as entries:
+        partitions = [LEGACY_PARTITION] + sorted(
+            entry.name for entry in entries
+            if entry.is_dir() and PARTITION_RE.match(entry.name)
+        )
+    last_partition, last_name = watermark if watermark else (None, None)
+    if watermark:
+        partitions = [partition for partition in partitions if partition >= last_partition]
+
+    candidates = []
+    stop = False
+    for partition in partitions:
+        if stop or (partition != LEGACY_PARTITION and _day_end(partition) >= cutoff):
+            break  # later days are newer still
+
+        directory = os.path.join(frames_dir, partition)
+        names = _list_frames(directory)
+        if partition == last_partition:
+            names = [name for name in names if name > last_name]
+
+        for name in names:
+            path = os.path.join(directory, name)
+            if partition == LEGACY_PARTITION:
+                try:
+                    if os.path.getmtime(path) >= cutoff:
+                        stop = True  # may belong to a detection still running; resume here later
+                        break
+                except FileNotFoundError:
+                    continue
+            candidates.append((partition, name, path))
+            if len(candidates) >= batch_size:
+                stop = True
+                break
+
+    if not candidates:
+        return 0, watermark
+
+    names = {}
+    for partition, name, path in candidates:
+        rel_name = os.path.relpath(path, settings.MEDIA_ROOT)
+        names[rel_name.replace("\\", "/")] = path
+        names[rel_name.replace("/", "\\")] = path
+
+    referenced = {
+        names[name] for name in
+        Violation.objects.filter(frame_image__in=list(names)).values_list('frame_image', flat=True)
+    }
+
+    deleted = 0
+    for partition, name, path in candidates:
+        if path not in referenced and _remove(path, dry_run):
+            deleted += 1
+
+    partition, name, path = candidates[-1]
+    return deleted, [partition, name]
+
+
+# ---------------------------
+# Sweep
+# ---------------------------
+def sweep(dry_run=False, full=False, now=None):
+    """Run one incremental sweep over every artifact type; returns counts per type.
+
+    Uploads and previews are scanned directly; they stay small because
+    everything past the cutoff is deleted. Violation frames are never scanned
+    as a whole: recompression follows ``Violation.id`` and orphan checks
+    follow (day, filename) order, both from stored watermarks. ``full`` ignores the
+    watermarks and starts over.
+    """
+    policies = get_policies()
+    batch_size = getattr(settings, "MEDIA_RETENTION_BATCH_SIZE", 500)
+    now = now or time.time()
+    state = {} if full else load_state()
+    media_root = str(settings.MEDIA_ROOT)
+    results = {}
+
+    for name, policy in policies.items():
+        action = policy["action"]
+        if action == "keep":
+            results[name] = 0
+            continue
+
+        cutoff = now - policy["max_age_hours"] * 3600
+        if name == "uploads":
+            results[name] = delete_old_files(media_root, cutoff, batch_size, recursive=False, dry_run=dry_run)
+        elif name == "previews":
+            results[name] = delete_old_files(os.path.join(media_root, "previews"), cutoff, batch_size, dry_run=dry_run)
+        elif name == "saved_violations":
+            results[name] = delete_old_files(os.path.join(media_root, "violations"), cutoff, batch_size, dry_run=dry_run)
+        elif name == "orphan_frames":
+            results[name], state[name] = delete_orphan_frames(cutoff, batch_size, state.get(name), dry_run=dry_run)
+        elif action == "delete":
+            results[name] = expire_violations(cutoff, batch_size, dry_run=dry_run)
+        else:
+            results[name], state[name] = recompress_violation_frames(
+                cutoff, policy.get("jpeg_quality", 60), batch_size, state.get(name), dry_run=dry_run,
+            )
+
+    if not dry_run:
+        save_state(state)
+    return results
@@ -10,8 +10,11 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.1/ref/settings/
 """
 
+import os
 from pathlib import Path
 
+from django.core.exceptions import ImproperlyConfigured
+
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -79,12 +82,49 @@ WSGI_APPLICATION = 'saferide_backend.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/5.1/ref/settings/#databases
 
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
+# Set DB_ENGINE=postgresql (plus the DB_* variables below) for multi-worker
+# deployments; SQLite stays the default for local development.
+
+DB_ENGINE = os.environ.get('DB_ENGINE', 'sqlite3')
+
+if DB_ENGINE not in ('sqlite3', 'postgresql'):
+    raise ImproperlyConfigured(f"DB_ENGINE must be 'sqlite3' or 'postgresql', got '{DB_ENGINE}'")
+
+if DB_ENGINE == 'postgresql':
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': os.environ.get('DB_NAME', 'saferide'),
+            'USER': os.environ.get('DB_USER', 'saferide'),
+            'PASSWORD': os.environ.get('DB_PASSWORD', ''),
+            'HOST': os.environ.get('DB_HOST', 'localhost'),
+            'PORT': os.environ.get('DB_PORT', '5432'),
+            # Reuse connections across requests instead of reconnecting each time
+            'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', '60')),
+            'CONN_HEALTH_CHECKS': True,
+            'OPTIONS': {},
+        }
+    }
+    # psycopg 3 connection pool (Django 5.1+); CONN_MAX_AGE must be 0 with a pool
+    if os.environ.get('DB_POOL', '').lower() in ('1', 'true', 'yes'):
+        DATABASES['default']['CONN_MAX_AGE'] = 0
+        DATABASES['default']['OPTIONS']['pool'] = {
+            'min_size': int(os.environ.get('DB_POOL_MIN_SIZE', '2')),
+            'max_size': int(os.environ.get('DB_POOL_MAX_SIZE', '10')),
+        }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.sqlite3',
+            'NAME': BASE_DIR / 'db.sqlite3',
+            'OPTIONS': {
+                # Wait for the file lock instead of failing with "database is locked",
+                # and take the write lock up front so concurrent writers don't deadlock
+                'timeout': 20,
+                'transaction_mode': 'IMMEDIATE',
+            },
+        }
     }
-}
 
 
 # Password validation
@@ -140,7 +180,20 @@ CSRF_TRUSTED_ORIGINS = [
 
 CORS_ALLOW_ALL_ORIGINS = True  # (not safe for production, but fine for dev)
 REST_FRAMEWORK = {
+    # Stateless JWT check + cached officer lookup (no per-request password hashing).
+    # Invalid/expired tokens count as anonymous here; ProfileView stays strict.
     'DEFAULT_AUTHENTICATION_CLASSES': [
-        'rest_framework.authentication.BasicAuthentication',
+        'accounts.authentication.OptionalCachedJWTAuthentication',
     ],
 }
+
+# In-process officer cache used by CachedJWTAuthentication
+OFFICER_CACHE_MAX_SIZE = 1024   # officers kept per worker (0 disables caching)
+OFFICER_CACHE_TTL = 300         # seconds before a cached officer is re-read
+
+# Media retention; run hourly with `python manage.py sweep_media`.
+# Overrides for DEFAULT_POLICIES in saferide_backend/retention.py, e.g.
+# {"uploads": {"max_age_hours": 12}, "saved_violations": {"action": "delete", "max_age_hours": 24 * 365}}
+MEDIA_RETENTION = {}
+MEDIA_RETENTION_BATCH_SIZE = 500   # files handled per artifact type per sweep
+MEDIA_RETENTION_STATE_FILE = BASE_DIR / '.media_retention.json'
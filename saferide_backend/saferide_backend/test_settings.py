@@ -0,0 +1,27 @@
+"""
+Test settings for saferide_backend.
+
+Runs the suite against an in-memory SQLite database as a local stand-in for
+PostgreSQL, so no database server is needed:
+
+    python manage.py test --settings=saferide_backend.test_settings
+"""
+
+from .settings import *  # noqa: F401,F403
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+        'OPTIONS': {
+            'transaction_mode': 'IMMEDIATE',
+        },
+    }
+}
+
+# Hashing cost is irrelevant in tests
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]
+
+MEDIA_ROOT = BASE_DIR / 'test_media'  # noqa: F405
@@ -0,0 +1,322 @@
+import base64
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from datetime import datetime, timedelta, timezone
+from unittest import mock
+
+import cv2
+import numpy as np
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import AsyncClient, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from . import retention
+from .models import Violation, save_violations
+
+
+class SaveViolationsTests(TestCase):
+    def test_batch_is_written_with_a_single_insert(self):
+        violations = [
+            Violation(frame_image=f"violation_frames/frame_{i}.jpg", violation_type="no_helmet", confidence=0.9)
+            for i in range(3)
+        ]
+
+        with CaptureQueriesContext(connection) as queries:
+            saved = save_violations(violations)
+
+        inserts = [q for q in queries.captured_queries if q["sql"].startswith("INSERT")]
+        self.assertEqual(len(inserts), 1)
+        self.assertEqual(Violation.objects.count(), 3)
+        self.assertTrue(all(v.pk is not None and v.created_at is not None for v in saved))
+
+
+@override_settings(MEDIA_RETENTION={})
+class RetentionTests(TestCase):
+    def setUp(self):
+        # Never touch the real MEDIA_ROOT: these tests delete files
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_settings = self.settings(
+            MEDIA_ROOT=media_root,
+            MEDIA_RETENTION_STATE_FILE=os.path.join(media_root, ".retention_state.json"),
+        )
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.now = time.time()
+        self.old = self.now - 30 * 24 * 3600
+
+    def _write_frame(self, name, mtime=None):
+        path = os.path.join(settings.MEDIA_ROOT, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        noise = np.random.default_rng(0).integers(0, 256, (64, 64, 3), dtype=np.uint8)
+        cv2.imwrite(path, noise, [cv2.IMWRITE_JPEG_QUALITY, 100])
+        if mtime is not None:
+            os.utime(path, (mtime, mtime))
+        return path
+
+    def _violation(self, name, created_at=None):
+        violation = Violation.objects.create(frame_image=name, violation_type="no_helmet", confidence=0.9)
+        if created_at is not None:
+            Violation.objects.filter(pk=violation.pk).update(created_at=created_at)
+        return violation
+
+    def test_get_policies_applies_overrides(self):
+        with self.settings(MEDIA_RETENTION={"uploads": {"max_age_hours": 12}}):
+            policies = retention.get_policies()
+        self.assertEqual(policies["uploads"], {"action": "delete", "max_age_hours": 12})
+        self.assertEqual(policies["previews"], retention.DEFAULT_POLICIES["previews"])
+
+    def test_get_policies_rejects_bad_config(self):
+        bad_configs = [
+            {"thumbnails": {"action": "delete", "max_age_hours": 1}},
+            {"uploads": {"action": "recompress"}},
+            {"saved_violations": {"action": "delete"}},
+        ]
+        for config in bad_configs:
+            with self.subTest(config=config), self.settings(MEDIA_RETENTION=config):
+                with self.assertRaises(ImproperlyConfigured):
+                    retention.get_policies()
+
+    def test_recompress_watermark_advances_without_reprocessing(self):
+        old = datetime.now(timezone.utc) - timedelta(days=30)
+        violations = []
+        for i in range(3):
+            name = f"violation_frames/2020-01-01/frame_{i}.jpg"
+            self._write_frame(name)
+            violations.append(self._violation(name, created_at=old))
+        cutoff = self.now - 24 * 3600
+
+        count, watermark = retention.recompress_violation_frames(cutoff, 60, 2, None)
+        self.assertEqual((count, watermark), (2, violations[1].pk))
+
+        count, watermark = retention.recompress_violation_frames(cutoff, 60, 2, watermark)
+        self.assertEqual((count, watermark), (1, violations[2].pk))
+
+        # Everything handled: the next sweep touches nothing and keeps its place
+        with self.assertNumQueries(1):
+            count, watermark = retention.recompress_violation_frames(cutoff, 60, 2, watermark)
+        self.assertEqual((count, watermark), (0, violations[2].pk))
+
+    def test_recompress_skips_violations_inside_retention_window(self):
+        self._write_frame("violation_frames/2020-01-01/frame_new.jpg")
+        self._violation("violation_frames/2020-01-01/frame_new.jpg")
+
+        count, watermark = retention.recompress_violation_frames(self.now - 24 * 3600, 60, 10, None)
+        self.assertEqual((count, watermark), (0, None))
+
+    def test_orphan_frames_respect_grace_period(self):
+        today = datetime.now().strftime("%Y-%m-%d")
+        old_orphan = self._write_frame("violation_frames/2020-01-01/frame_orphan.jpg")
+        old_kept = self._write_frame("violation_frames/2020-01-01/frame_kept.jpg")
+        new_orphan = self._write_frame(f"violation_frames/{today}/frame_orphan.jpg")
+        self._violation("violation_frames/2020-01-01/frame_kept.jpg")
+
+        deleted, watermark = retention.delete_orphan_frames(self.now - 6 * 3600, 500, None)
+
+        self.assertEqual((deleted, watermark), (1, ["2020-01-01", "frame_orphan.jpg"]))
+        self.assertFalse(os.path.exists(old_orphan))
+        self.assertTrue(os.path.exists(old_kept))
+        self.assertTrue(os.path.exists(new_orphan))  # today's partition is still open
+
+    def test_orphan_sweep_is_bounded_and_resumes_after_watermark(self):
+        for name in ("frame_a.jpg", "frame_b.jpg", "frame_c.jpg"):
+            self._write_frame(f"violation_frames/2020-01-01/{name}")
+        cutoff = self.now - 6 * 3600
+
+        deleted, watermark = retention.delete_orphan_frames(cutoff, 2, None)
+        self.assertEqual((deleted, watermark), (2, ["2020-01-01", "frame_b.jpg"]))
+
+        deleted, watermark = retention.delete_orphan_frames(cutoff, 2, watermark)
+        self.assertEqual((deleted, watermark), (1, ["2020-01-01", "frame_c.jpg"]))
+
+        # Frames at or before the watermark are not checked again
+        early = self._write_frame("violation_frames/2020-01-01/frame_0.jpg")
+        deleted, watermark = retention.delete_orphan_frames(cutoff, 2, watermark)
+        self.assertEqual((deleted, watermark), (0, ["2020-01-01", "frame_c.jpg"]))
+        self.assertTrue(os.path.exists(early))
+
+    def test_young_legacy_frame_pauses_orphan_sweep(self):
+        self._write_frame("violation_frames/frame_a.jpg", mtime=self.old)
+        young = self._write_frame("violation_frames/frame_b.jpg")
+        self._write_frame("violation_frames/2020-01-01/frame_c.jpg")
+        cutoff = self.now - 6 * 3600
+
+        deleted, watermark = retention.delete_orphan_frames(cutoff, 500, None)
+        self.assertEqual((deleted, watermark), (1, [retention.LEGACY_PARTITION, "frame_a.jpg"]))
+        self.assertTrue(os.path.exists(young))
+
+        os.utime(young, (self.old, self.old))
+        deleted, watermark = retention.delete_orphan_frames(cutoff, 500, watermark)
+        self.assertEqual((deleted, watermark), (2, ["2020-01-01", "frame_c.jpg"]))
+
+    def test_full_sweep_over_legacy_frames(self):
+        old = datetime.now(timezone.utc) - timedelta(days=30)
+        legacy_kept = self._write_frame("violation_frames/frame_kept.jpg", mtime=self.old)
+        legacy_orphan = self._write_frame("violation_frames/frame_orphan.jpg", mtime=self.old)
+        day_orphan = self._write_frame("violation_frames/2020-01-01/frame_orphan.jpg")
+        self._violation("violation_frames/frame_kept.jpg", created_at=old)
+        kept_size = os.path.getsize(legacy_kept)
+
+        results = retention.sweep(now=self.now)
+
+        # Recompression shrinks the frame but keeps its age, so the orphan pass isn't held back
+        self.assertEqual(results["violation_frames"], 1)
+        self.assertLess(os.path.getsize(legacy_kept), kept_size)
+        self.assertAlmostEqual(os.path.getmtime(legacy_kept), self.old, places=3)
+        self.assertEqual(results["orphan_frames"], 2)
+        self.assertFalse(os.path.exists(legacy_orphan))
+        self.assertFalse(os.path.exists(day_orphan))
+
+        state = retention.load_state()
+        self.assertEqual(state["orphan_frames"], ["2020-01-01", "frame_orphan.jpg"])
+        self.assertEqual(retention.sweep(now=self.now), {name: 0 for name in retention.DEFAULT_POLICIES})
+
+    def test_expire_violations_deletes_rows_then_files(self):
+        old = datetime.now(timezone.utc) - timedelta(days=30)
+        path = self._write_frame("violation_frames/2020-01-01/frame_old.jpg")
+        self._violation("violation_frames/2020-01-01/frame_old.jpg", created_at=old)
+
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            self.assertEqual(retention.expire_violations(self.now - 24 * 3600, 500), 1)
+        self.assertFalse(Violation.objects.exists())
+        self.assertTrue(os.path.exists(path))  # files only go once the delete commits
+
+        for callback in callbacks:
+            callback()
+        self.assertFalse(os.path.exists(path))
+
+    def test_dry_run_leaves_everything_untouched(self):
+        old = datetime.now(timezone.utc) - timedelta(days=30)
+        upload = self._write_frame("upload.jpg", mtime=self.old)
+        preview = self._write_frame("previews/preview_1.jpg", mtime=self.old)
+        frame = self._write_frame("violation_frames/2020-01-01/frame_old.jpg")
+        orphan = self._write_frame("violation_frames/2020-01-01/frame_orphan.jpg")
+        self._violation("violation_frames/2020-01-01/frame_old.jpg", created_at=old)
+        sizes = {path: os.path.getsize(path) for path in (upload, preview, frame, orphan)}
+
+        with self.settings(MEDIA_RETENTION={"violation_frames": {"action": "delete"}}):
+            results = retention.sweep(dry_run=True, now=self.now)
+
+        self.assertEqual(results["uploads"], 1)
+        self.assertEqual(results["previews"], 1)
+        self.assertEqual(results["violation_frames"], 1)
+        self.assertEqual(results["orphan_frames"], 1)
+        for path, size in sizes.items():
+            self.assertEqual(os.path.getsize(path), size)
+        self.assertEqual(Violation.objects.count(), 1)
+        self.assertFalse(os.path.exists(settings.MEDIA_RETENTION_STATE_FILE))
+
+
+def fake_detect_frame(frame):
+    return frame, [{"type": "no_helmet", "confidence": 0.9, "bbox": (0, 0, 8, 8)}]
+
+
+class AsyncViewsTests(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root, ignore_errors=True)
+        media_settings = self.settings(MEDIA_ROOT=media_root)
+        media_settings.enable()
+        self.addCleanup(media_settings.disable)
+        self.media_root = media_root
+        self.client = AsyncClient()
+
+    def _video(self, frames=6):
+        path = os.path.join(self.media_root, "clip.mp4")
+        writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'mp4v'), 10, (32, 32))
+        for i in range(frames):
+            writer.write(np.full((32, 32, 3), i * 40, dtype=np.uint8))
+        writer.release()
+        with open(path, "rb") as f:
+            return SimpleUploadedFile("clip.mp4", f.read(), content_type="video/mp4")
+
+    async def _streamed_text(self, response):
+        return b"".join([chunk async for chunk in response.streaming_content]).decode()
+
+    @mock.patch("saferide_backend.views.detect_frame", fake_detect_frame)
+    async def test_detect_streams_progress_then_data(self):
+        response = await self.client.post("/api/async/detect/", {"file": self._video()})
+        self.assertEqual(response.status_code, 200)
+        lines = (await self._streamed_text(response)).splitlines()
+
+        progress, data_line = lines[:-1], lines[-1]
+        self.assertTrue(progress)
+        self.assertTrue(all(re.search(r"\((\d+\.?\d*)%\)", line) for line in progress))
+        self.assertTrue(data_line.startswith("DATA:"))
+        self.assertEqual(sum(line.startswith("DATA:") for line in lines), 1)
+
+        payload = json.loads(data_line[len("DATA:"):])
+        self.assertEqual(len(payload["violations"]), 3)  # every other frame of 6
+        self.assertEqual(await Violation.objects.acount(), 3)
+        self.assertRegex(payload["annotated_video"], r"^/media/previews/output_[0-9a-f-]+\.mp4$")
+
+        second = await self.client.post("/api/async/detect/", {"file": self._video()})
+        second_payload = json.loads((await self._streamed_text(second)).splitlines()[-1][len("DATA:"):])
+        self.assertNotEqual(second_payload["annotated_video"], payload["annotated_video"])
+
+    async def test_detect_rejects_non_video(self):
+        upload = SimpleUploadedFile("notes.txt", b"hello", content_type="text/plain")
+        response = await self.client.post("/api/async/detect/", {"file": upload})
+        self.assertEqual(response.status_code, 400)
+
+    async def test_live_detect_rejects_invalid_input(self):
+        bad_bodies = [
+            {"image_base64": "!!!"},
+            {"image_base64": "data:,"},
+            {"image_base64": base64.b64encode(b"not an image").decode()},
+            {"image_base64": 123},
+            {},
+            [],
+        ]
+        for body in bad_bodies:
+            with self.subTest(body=body):
+                response = await self.client.post(
+                    "/api/async/live-detect/", json.dumps(body), content_type="application/json"
+                )
+                self.assertEqual(response.status_code, 400)
+
+        response = await self.client.post(
+            "/api/async/live-detect/", b"\xff not json", content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+    @mock.patch("saferide_backend.async_views.detect_frame", fake_detect_frame)
+    async def test_live_detect_returns_annotated_frame(self):
+        ok, jpeg = cv2.imencode(".jpg", np.zeros((16, 16, 3), dtype=np.uint8))
+        image = "data:image/jpeg;base64," + base64.b64encode(jpeg.tobytes()).decode()
+
+        response = await self.client.post(
+            "/api/async/live-detect/", json.dumps({"image_base64": image}), content_type="application/json"
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertTrue(data["annotated_image_base64"].startswith("data:image/jpeg;base64,"))
+        self.assertEqual(data["violation_types"], [{"type": "no_helmet", "confidence": 0.9}])
+
+    async def test_violations_stream_is_json_newest_first(self):
+        now = datetime.now(timezone.utc)
+        pks = []
+        for days in (3, 1, 2):
+            violation = await Violation.objects.acreate(
+                frame_image="violation_frames/frame.jpg", violation_type="no_helmet", confidence=0.9
+            )
+            await Violation.objects.filter(pk=violation.pk).aupdate(created_at=now - timedelta(days=days))
+            pks.append(violation.pk)
+
+        response = await self.client.get("/api/async/violations/")
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(await self._streamed_text(response))
+
+        self.assertEqual([item["id"] for item in data], [pks[1], pks[2], pks[0]])
+
+    async def test_violations_stream_empty_list(self):
+        response = await self.client.get("/api/async/violations/")
+        self.assertEqual(json.loads(await self._streamed_text(response)), [])
@@ -18,6 +18,7 @@ from django.contrib import admin
 from django.urls import path, include
 from django.http import HttpResponse
 from .views import home, DetectView, LiveDetectView, SaveViolationView, SavedViolationsView, ViolationsListView
+from .async_views import async_detect, async_live_detect, async_violations_list
 from django.conf import settings
 from django.conf.urls.static import static
 
@@ -30,6 +31,10 @@ urlpatterns = [
     path("api/save-violation/", SaveViolationView.as_view(), name="save_violation"),
     path("api/saved-violations/", SavedViolationsView.as_view(), name="saved_violations"),
     path("api/violations/", ViolationsListView.as_view(), name="violations_list"),
+    # Async variants (serve under ASGI, e.g. `uvicorn saferide_backend.asgi:application`)
+    path("api/async/detect/", async_detect, name="async_detect"),
+    path("api/async/live-detect/", async_live_detect, name="async_live_detect"),
+    path("api/async/violations/", async_violations_list, name="async_violations_list"),
 ]
 
 if settings.DEBUG:
@@ -7,19 +7,30 @@ from django.conf import settings
 import cv2
 import numpy as np
 from PIL import Image
-from ultralytics import YOLO
 from inference_sdk import InferenceHTTPClient
 import tempfile
+import threading
 import os
 import uuid
 from datetime import datetime
 import math
-from .models import Violation
+from .models import Violation, save_violations
 from .serializers import ViolationSerializer
 # Load models (updated for merged 2wheeler model)
-# Load YOLO model
+# YOLO model is loaded on first use, so importing the views stays cheap
 model_dir = os.path.join(settings.BASE_DIR.parent, "")
-merged_2whe_model = YOLO(os.path.join(model_dir, "best.pt"))
+merged_2whe_model = None
+# The YOLO predictor is not thread-safe; every caller (sync views and the
+# async executor) must hold this lock while running the model
+inference_lock = threading.Lock()
+
+def get_model():
+    """Return the YOLO model, loading it on first call. Caller holds ``inference_lock``."""
+    global merged_2whe_model
+    if merged_2whe_model is None:
+        from ultralytics import YOLO
+        merged_2whe_model = YOLO(os.path.join(model_dir, "best.pt"))
+    return merged_2whe_model
 
 violation_classes = {
     0: "number_plate",
@@ -59,7 +70,8 @@ def detect_frame(frame):
     plates = []
     vehicle_no_plate = []
 
-    results = merged_2whe_model(frame, conf=0.1)[0]
+    with inference_lock:
+        results = get_model()(frame, conf=0.1)[0]
 
     print(f"Detected {len(results.boxes)} objects")
 
@@ -110,6 +122,62 @@ def detect_frame(frame):
 
     return frame, violations
 
+def open_preview_writer(cap):
+    """Create the annotated preview video for ``cap``; returns (writer, preview_name)."""
+    fps = int(cap.get(cv2.CAP_PROP_FPS))
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+
+    preview_dir = os.path.join(settings.MEDIA_ROOT, 'previews')
+    os.makedirs(preview_dir, exist_ok=True)
+    # Unique per request so concurrent uploads don't overwrite each other's preview
+    preview_name = f"output_{uuid.uuid4()}.mp4"
+    video_out_path = os.path.join(preview_dir, preview_name)
+    out = cv2.VideoWriter(video_out_path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
+    return out, preview_name
+
+def iter_video_detections(cap, out):
+    """Run detection on every other frame of ``cap``, writing annotated frames to ``out``.
+
+    Yields ``(frame_count, total_frames, violations)`` after each processed frame,
+    where ``violations`` are unsaved Violation rows for that frame. Both the
+    capture and the writer are released when the generator finishes or is closed.
+    """
+    total_frames = int(cap.get(cv2.CAP_PROP_FRAME_COUNT))
+    frame_count = 0
+    try:
+        while cap.isOpened():
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frame_count += 1
+            if frame_count % 2 != 0:
+                continue  # skip alternate frames
+
+            processed_frame, violations_in_frame = detect_frame(frame)
+
+            frame_violations = []
+            for violation in violations_in_frame:
+                # Save frame image
+                # Partitioned by day so the retention sweeper can skip finished days
+                frame_name = os.path.join(datetime.now().strftime("%Y-%m-%d"), f"frame_{uuid.uuid4()}.jpg")
+                frame_path = os.path.join(settings.MEDIA_ROOT, "violation_frames", frame_name)
+                os.makedirs(os.path.dirname(frame_path), exist_ok=True)
+                cv2.imwrite(frame_path, processed_frame)
+
+                # Collect rows; they are written in one batch after the video is processed
+                frame_violations.append(Violation(
+                    frame_image=os.path.join("violation_frames", frame_name),
+                    violation_type=violation["type"],
+                    confidence=violation["confidence"]
+                ))
+
+            out.write(processed_frame)
+            yield frame_count, total_frames, frame_violations
+    finally:
+        cap.release()
+        out.release()
+
 class DetectView(APIView):
     def post(self, request):
         if "file" not in request.FILES:
@@ -126,48 +194,14 @@ class DetectView(APIView):
         if is_video:
             cap = cv2.VideoCapture(filepath)
             if not cap.isOpened():
+                cap.release()
                 return Response({"error": "Cannot open video"}, status=400)
 
-            fps = int(cap.get(cv2.CAP_PROP_FPS))
-            width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
-            height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
-
-            preview_dir = os.path.join(settings.MEDIA_ROOT, 'previews')
-            os.makedirs(preview_dir, exist_ok=True)
-            video_out_path = os.path.join(preview_dir, "output.mp4")
-            out = cv2.VideoWriter(video_out_path, cv2.VideoWriter_fourcc(*'mp4v'), fps, (width, height))
-
-
-            frame_count = 0
-            while cap.isOpened():
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                frame_count += 1
-                if frame_count % 2 != 0:
-                    continue  # skip alternate frames
-
-                processed_frame, violations_in_frame = detect_frame(frame)
-
-                for violation in violations_in_frame:
-                    # Save frame image
-                    frame_name = f"frame_{uuid.uuid4()}.jpg"
-                    frame_path = os.path.join(settings.MEDIA_ROOT, "violation_frames", frame_name)
-                    os.makedirs(os.path.dirname(frame_path), exist_ok=True)
-                    cv2.imwrite(frame_path, processed_frame)
-
-                    # Save each violation individually
-                    violation_obj = Violation.objects.create(
-                        frame_image=os.path.join("violation_frames", frame_name),
-                        violation_type=violation["type"],
-                        confidence=violation["confidence"]
-                    )
-                    violations_created.append(violation_obj)
-
-                out.write(processed_frame)
-
-            cap.release()
-            out.release()
+            out, preview_name = open_preview_writer(cap)
+            for _, _, frame_violations in iter_video_detections(cap, out):
+                violations_created.extend(frame_violations)
+
+            violations_created = save_violations(violations_created)
         else:
             return Response({"error": "Only video files supported"}, status=400)
 
@@ -175,7 +209,7 @@ class DetectView(APIView):
         serializer = ViolationSerializer(violations_created, many=True)
         return Response({
             "violations": serializer.data,
-            "annotated_video": f"{settings.MEDIA_URL}previews/output.mp4"
+            "annotated_video": f"{settings.MEDIA_URL}previews/{preview_name}"
         })
 
 